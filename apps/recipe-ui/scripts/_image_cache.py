@@ -0,0 +1,239 @@
+"""Helpers shared by the recipe image caching scripts.
+
+Both ``cache_recipe_images.py`` and ``cache_source_preview_images.py`` write
+into the same image directory and revalidation index, so the slugging, file
+streaming and index format live here rather than in two hand-synced copies.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+CacheRecord = Dict[str, Optional[str]]
+
+
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+WRITE_BUFFER_BYTES = 1024 * 1024
+# Kept beside recipes.json rather than in the image directory, which Vite
+# publishes verbatim from public/.
+DEFAULT_CACHE_INDEX_PATH = Path(".image_cache_index.json")
+MAX_IMAGE_BYTES = 15_000_000
+# Image CDNs that only ever serve images; skip the HEAD round trip for them.
+TRUSTED_IMAGE_HOSTS = ("cdninstagram.com", "fbcdn.net", "supabase.co")
+BINARY_CONTENT_TYPES = frozenset({"application/octet-stream", "binary/octet-stream"})
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/118.0 Safari/537.36"
+)
+
+SAFE_SLUG_RE = re.compile(r"[^a-z0-9]+")
+
+
+def load_recipes(path: Path) -> Dict:
+    if orjson is not None:
+        return orjson.loads(path.read_bytes())
+    with path.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def dump_recipes(recipes: Dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(recipes, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(recipes, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+
+def write_recipes(path: Path, recipes: Dict) -> None:
+    partial = path.with_name(f"{path.name}.tmp")
+    with partial.open("wb") as handle:
+        handle.write(dump_recipes(recipes))
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(partial, path)
+
+
+def ensure_directory(path: Path) -> None:
+    path.mkdir(parents=True, exist_ok=True)
+
+
+def list_existing_files(directory: Path) -> Set[str]:
+    with os.scandir(directory) as entries:
+        return {entry.name for entry in entries}
+
+
+def to_public_path(path: Path) -> Optional[str]:
+    try:
+        relative = path.relative_to(Path("public"))
+    except ValueError:
+        return None
+    return f"/{relative.as_posix()}"
+
+
+def slugify(value: str) -> str:
+    slug = SAFE_SLUG_RE.sub("-", value.lower()).strip("-")
+    if slug:
+        return slug[:60]
+    return f"recipe-{hashlib.blake2b(value.encode('utf-8'), digest_size=5).hexdigest()}"
+
+
+def assign_slugs(titles: Iterable[str]) -> List[str]:
+    """Return a unique slug per title, suffixing repeats as ``slug-2``, ``slug-3``..."""
+    seen: Dict[str, int] = {}
+    final_slugs: List[str] = []
+    for slug in map(slugify, titles):
+        seen[slug] = seen.get(slug, 0) + 1
+        final_slugs.append(slug if seen[slug] == 1 else f"{slug}-{seen[slug]}")
+    return final_slugs
+
+
+def url_suffix(url: str) -> str:
+    """Return the lowercased file extension of a URL's path, or ``""``."""
+    end = len(url)
+    for delimiter in "?#":
+        index = url.find(delimiter, 0, end)
+        if index != -1:
+            end = index
+    path_start = 0
+    scheme = url.find("://", 0, end)
+    if scheme != -1:
+        path_start = url.find("/", scheme + 3, end)
+        if path_start == -1:
+            return ""
+    dot = url.rfind(".", path_start, end)
+    slash = url.rfind("/", path_start, end)
+    if dot > slash + 1 and 1 < end - dot <= 6:
+        return url[dot:end].lower()
+    return ""
+
+
+def stream_to_file(chunks: Iterable[bytes], target: Path) -> str:
+    """Write ``chunks`` to ``target`` through a temp file; return the SHA-1 of the bytes."""
+    partial = target.with_name(f"{target.name}.part")
+    try:
+        digest = hashlib.sha1()
+        with partial.open("wb", buffering=WRITE_BUFFER_BYTES) as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+                digest.update(chunk)
+        os.replace(partial, target)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return digest.hexdigest()
+
+
+def file_sha1(path: Path) -> str:
+    digest = hashlib.sha1()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(DOWNLOAD_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(url: str, final_slug: str) -> str:
+    # Recipes sharing one image URL each keep their own file, so each needs its
+    # own record; keying by URL alone left all but the last one unrevalidated.
+    return f"{final_slug}:{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
+
+
+def load_cache_index(path: Path) -> Dict[str, CacheRecord]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache_index(path: Path, cache_index: Dict[str, CacheRecord]) -> None:
+    data = json.dumps(cache_index, indent=2, sort_keys=True) + "\n"
+    stream_to_file([data.encode("utf-8")], path)
+
+
+def conditional_headers(
+    record: Optional[CacheRecord], image_dir: Path, final_slug: str
+) -> Dict[str, str]:
+    # A 304 reuses the recorded file, so only revalidate while that file is still
+    # this recipe's target and still holds the bytes the record was written for.
+    if not record or not record.get("path") or not record.get("contentHash"):
+        return {}
+    cached = image_dir / record["path"]
+    if cached.stem != final_slug or not cached.is_file():
+        return {}
+    if file_sha1(cached) != record["contentHash"]:
+        return {}
+    headers: Dict[str, str] = {}
+    if record.get("etag"):
+        headers["If-None-Match"] = record["etag"]
+    if record.get("lastModified"):
+        headers["If-Modified-Since"] = record["lastModified"]
+    return headers
+
+
+def probe_image(session: requests.Session, url: str, headers: Dict[str, str]) -> None:
+    """Raise if a HEAD request shows ``url`` is not an image or is too large to cache."""
+    host = (urlparse(url).hostname or "").lower()
+    if any(host == trusted or host.endswith(f".{trusted}") for trusted in TRUSTED_IMAGE_HOSTS):
+        return
+    try:
+        head = session.head(url, headers=headers, timeout=10, allow_redirects=True)
+    except requests.RequestException:
+        return  # Let the GET surface the real failure.
+    if not head.ok:
+        return
+
+    mime_type = head.headers.get("Content-Type", "").split(";")[0].strip().lower()
+    if mime_type and not mime_type.startswith("image/") and mime_type not in BINARY_CONTENT_TYPES:
+        raise ValueError(f"not an image ({mime_type})")
+    length = head.headers.get("Content-Length", "")
+    if length.isdigit() and int(length) > MAX_IMAGE_BYTES:
+        raise ValueError(f"image too large ({length} bytes)")
+
+
+def download_image(
+    session: requests.Session,
+    url: str,
+    headers: Dict[str, str],
+    image_dir: Path,
+    final_slug: str,
+    cache_index: Dict[str, CacheRecord],
+    guess_extension: Callable[[str, Optional[str]], str],
+) -> Tuple[Path, Optional[CacheRecord]]:
+    """Download ``url`` into ``image_dir``, revalidating against ``cache_index``.
+
+    Returns the local file and its new index record, or ``None`` for the record
+    when the server answered 304 and the previously cached file was reused.
+    """
+    record = cache_index.get(cache_key(url, final_slug))
+    revalidate = conditional_headers(record, image_dir, final_slug)
+    headers = {**headers, **revalidate}
+    if not revalidate:
+        probe_image(session, url, headers)
+    with session.get(url, headers=headers, timeout=30, stream=True) as response:
+        if response.status_code == 304 and revalidate:
+            return image_dir / record["path"], None
+        response.raise_for_status()
+        ext = guess_extension(url, response.headers.get("Content-Type"))
+        target_path = image_dir / f"{final_slug}{ext}"
+        content_hash = stream_to_file(response.iter_content(DOWNLOAD_CHUNK_BYTES), target_path)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+    return target_path, {
+        "url": url,
+        "path": target_path.name,
+        "etag": etag,
+        "lastModified": last_modified,
+        "contentHash": content_hash,
+    }
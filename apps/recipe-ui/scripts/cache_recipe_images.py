@@ -14,28 +14,40 @@ Use `--help` for additional options.
 from __future__ import annotations
 
 import argparse
-import hashlib
-import json
+import functools
 import mimetypes
-import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Iterable, Tuple
-from urllib.error import URLError, HTTPError
-from urllib.parse import urlparse
-from urllib.request import Request, urlopen
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from _image_cache import (
+    DEFAULT_CACHE_INDEX_PATH,
+    USER_AGENT,
+    CacheRecord,
+    assign_slugs,
+    cache_key,
+    download_image,
+    ensure_directory,
+    list_existing_files,
+    load_cache_index,
+    load_recipes,
+    save_cache_index,
+    to_public_path,
+    url_suffix,
+    write_recipes,
+)
 
 
 DEFAULT_RECIPES_PATH = Path("recipes.json")
 DEFAULT_OUTPUT_PATH = DEFAULT_RECIPES_PATH
 DEFAULT_IMAGE_DIR = Path("public/images/recipes")
-USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/118.0 Safari/537.36"
-)
+DEFAULT_CONCURRENCY = 16
+POOL_SIZE = 16
 
-SAFE_SLUG_RE = re.compile(r"[^a-z0-9]+")
 VALID_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 
 
@@ -59,6 +71,12 @@ def parse_args() -> argparse.Namespace:
         default=DEFAULT_IMAGE_DIR,
         help="Directory to store cached images (default: public/images/recipes)",
     )
+    parser.add_argument(
+        "--cache-index",
+        type=Path,
+        default=DEFAULT_CACHE_INDEX_PATH,
+        help="Where to keep the download revalidation index (default: .image_cache_index.json)",
+    )
     parser.add_argument(
         "--skip-existing",
         action="store_true",
@@ -69,53 +87,86 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Do not download or modify files; just report planned actions",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Maximum number of simultaneous downloads (default: {DEFAULT_CONCURRENCY})",
+    )
     return parser.parse_args()
 
 
-def load_recipes(recipes_path: Path) -> Dict:
-    with recipes_path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
+def build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 
-def slugify(title: str) -> str:
-    slug = SAFE_SLUG_RE.sub("-", title.lower()).strip("-")
-    if not slug:
-        slug = f"recipe-{hashlib.sha1(title.encode('utf-8')).hexdigest()[:10]}"
-    return slug[:60]
+def guess_extension(url: str, content_type: str | None) -> str:
+    mime_type = content_type.split(";")[0].strip().lower() if content_type else None
+    return _guess_extension(url_suffix(url), mime_type)
 
 
-def guess_extension(url: str, content_type: str | None) -> str:
-    parsed = urlparse(url)
-    url_ext = Path(parsed.path).suffix.lower()
+@functools.lru_cache(maxsize=4096)
+def _guess_extension(url_ext: str, mime_type: str | None) -> str:
     if url_ext in VALID_EXTENSIONS:
         return url_ext
 
-    if content_type:
-        ext = mimetypes.guess_extension(content_type.split(";")[0].strip())
+    if mime_type:
+        ext = mimetypes.guess_extension(mime_type)
         if ext in VALID_EXTENSIONS:
             return ext
 
     return ".jpg"
 
 
-def download_image(url: str) -> Tuple[bytes, str]:
-    request = Request(url, headers={"User-Agent": USER_AGENT})
-    with urlopen(request, timeout=30) as response:
-        content = response.read()
-        content_type = response.headers.get("Content-Type")
-    return content, content_type
-
-
-def ensure_directory(path: Path) -> None:
-    path.mkdir(parents=True, exist_ok=True)
-
-
-def _to_public_path(path: Path) -> str | None:
+def cache_image(
+    session: requests.Session,
+    image_url: str,
+    image_dir: Path,
+    final_slug: str,
+    cache_index: Dict[str, CacheRecord],
+) -> Optional[Tuple[Path, Optional[CacheRecord]]]:
     try:
-        rel = path.relative_to(Path("public"))
-    except ValueError:
-        return None
-    return f"/{rel.as_posix()}"
+        target_file, record = download_image(
+            session,
+            image_url,
+            {"User-Agent": USER_AGENT},
+            image_dir,
+            final_slug,
+            cache_index,
+            guess_extension,
+        )
+        if record:
+            print(f"Downloaded {image_url} -> {target_file}")
+        else:
+            print(f"Not modified {image_url} -> {target_file}")
+        return target_file, record
+    except requests.HTTPError as error:
+        status = error.response.status_code if error.response is not None else "?"
+        print(f"[warning] HTTP error {status} for {image_url}", file=sys.stderr)
+    except requests.RequestException as error:
+        print(f"[warning] URL error for {image_url}: {error}", file=sys.stderr)
+    except Exception as exc:  # pylint: disable=broad-except
+        print(f"[warning] Failed to cache {image_url}: {exc}", file=sys.stderr)
+    return None
+
+
+def cache_images(
+    session: requests.Session,
+    jobs: List[Tuple[str, str]],
+    image_dir: Path,
+    cache_index: Dict[str, CacheRecord],
+    concurrency: int,
+) -> List[Optional[Tuple[Path, Optional[CacheRecord]]]]:
+    def run(job: Tuple[str, str]) -> Optional[Tuple[Path, Optional[CacheRecord]]]:
+        image_url, final_slug = job
+        return cache_image(session, image_url, image_dir, final_slug, cache_index)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        return list(executor.map(run, jobs))
 
 
 def update_recipes(
@@ -123,57 +174,71 @@ def update_recipes(
     image_dir: Path,
     skip_existing: bool,
     dry_run: bool,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    session: Optional[requests.Session] = None,
+    cache_index_path: Path = DEFAULT_CACHE_INDEX_PATH,
 ) -> bool:
     ensure_directory(image_dir)
+    existing = list_existing_files(image_dir) if skip_existing else set()
     changed = False
-    slug_counts: Dict[str, int] = {}
+    pending: List[Dict] = []
+    jobs: List[Tuple[str, str]] = []
 
+    # Resolve every slug before any I/O so numbering never depends on the
+    # order in which downloads finish.
+    eligible: List[Tuple[Dict, str]] = []
     for entry in recipes.get("recipes", []):
         image_url = (entry.get("imageUrl") or "").strip()
-        title = entry.get("title", "").strip() or "recipe"
+        if image_url and not image_url.startswith(("data:", "/")):
+            eligible.append((entry, image_url))
+    final_slugs = assign_slugs(
+        entry.get("title", "").strip() or "recipe" for entry, _ in eligible
+    )
 
-        if not image_url or image_url.startswith(("data:", "/")):
-            continue
+    for (entry, image_url), final_slug in zip(eligible, final_slugs):
+        ext = guess_extension(image_url, None)
+        target_file = image_dir / f"{final_slug}{ext}"
 
-        slug = slugify(title)
-        slug_counts.setdefault(slug, 0)
-        slug_counts[slug] += 1
-        final_slug = slug if slug_counts[slug] == 1 else f"{slug}-{slug_counts[slug]}"
-
-        try:
-            ext = guess_extension(image_url, None)
-            target_file = image_dir / f"{final_slug}{ext}"
-
-            if skip_existing and target_file.exists():
-                new_url = _to_public_path(target_file)
-                if new_url and entry.get("imageUrl") != new_url:
-                    entry["imageUrl"] = new_url
-                    changed = True
-                continue
-
-            if dry_run:
-                print(f"[dry-run] Would download {image_url} -> {target_file}")
-                continue
-
-            content, content_type = download_image(image_url)
-            ext = guess_extension(image_url, content_type)
-            target_file = image_dir / f"{final_slug}{ext}"
-
-            target_file.write_bytes(content)
-            new_url = _to_public_path(target_file)
-            if new_url:
+        if target_file.name in existing:
+            new_url = to_public_path(target_file)
+            if new_url and entry.get("imageUrl") != new_url:
                 entry["imageUrl"] = new_url
-            else:
-                entry["imageUrl"] = str(target_file.as_posix())
-            changed = True
-            print(f"Downloaded {image_url} -> {target_file}")
-        except HTTPError as error:
-            print(f"[warning] HTTP error {error.code} for {image_url}", file=sys.stderr)
-        except URLError as error:
-            print(f"[warning] URL error for {image_url}: {error.reason}", file=sys.stderr)
-        except Exception as exc:  # pylint: disable=broad-except
-            print(f"[warning] Failed to cache {image_url}: {exc}", file=sys.stderr)
+                changed = True
+            continue
+
+        if dry_run:
+            print(f"[dry-run] Would download {image_url} -> {target_file}")
+            continue
 
+        pending.append(entry)
+        jobs.append((image_url, final_slug))
+
+    if not jobs:
+        return changed
+
+    # Downloads are network-bound and release the GIL, so a thread pool
+    # overlaps them; entries and the cache index are only mutated here on the
+    # calling thread once every download has settled.
+    cache_index = load_cache_index(cache_index_path)
+    session = session or build_session()
+    results = cache_images(session, jobs, image_dir, cache_index, concurrency)
+    index_changed = False
+    for entry, (_, final_slug), result in zip(pending, jobs, results):
+        if result is None:
+            continue
+        target_file, record = result
+        if record:
+            cache_index[cache_key(record["url"], final_slug)] = record
+            index_changed = True
+        new_url = to_public_path(target_file)
+        if new_url:
+            entry["imageUrl"] = new_url
+        else:
+            entry["imageUrl"] = str(target_file.as_posix())
+        changed = True
+
+    if index_changed:
+        save_cache_index(cache_index_path, cache_index)
     return changed
 
 
@@ -181,15 +246,21 @@ def main() -> int:
     args = parse_args()
 
     recipes = load_recipes(args.recipes_file)
-    changed = update_recipes(recipes, args.image_dir, args.skip_existing, args.dry_run)
+    changed = update_recipes(
+        recipes,
+        args.image_dir,
+        args.skip_existing,
+        args.dry_run,
+        args.concurrency,
+        build_session(),
+        args.cache_index,
+    )
 
     if args.dry_run:
         return 0
 
     if changed:
-        with args.output_file.open("w", encoding="utf-8") as handle:
-            json.dump(recipes, handle, ensure_ascii=False, indent=2)
-            handle.write("\n")
+        write_recipes(args.output_file, recipes)
         print(f"Wrote updated recipes to {args.output_file}")
     else:
         print("No changes made.")
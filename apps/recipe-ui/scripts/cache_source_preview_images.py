@@ -10,27 +10,47 @@ reference the cached copy.
 from __future__ import annotations
 
 import argparse
-import hashlib
+import functools
 import html
-import json
 import mimetypes
 import re
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Iterable, Optional, Tuple
-from urllib.parse import urljoin, urlparse
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urljoin
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from _image_cache import (
+    DEFAULT_CACHE_INDEX_PATH,
+    USER_AGENT,
+    CacheRecord,
+    assign_slugs,
+    cache_key,
+    download_image,
+    ensure_directory,
+    list_existing_files,
+    load_cache_index,
+    load_recipes,
+    save_cache_index,
+    to_public_path,
+    url_suffix,
+    write_recipes,
+)
 
 
 DEFAULT_RECIPES_PATH = Path("recipes.json")
 DEFAULT_OUTPUT_PATH = DEFAULT_RECIPES_PATH
 DEFAULT_IMAGE_DIR = Path("public/images/recipes")
-USER_AGENT = (
-    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-    "AppleWebKit/537.36 (KHTML, like Gecko) "
-    "Chrome/118.0 Safari/537.36"
-)
+DEFAULT_CONCURRENCY = 16
+POOL_SIZE = 32
+MAX_PAGE_BYTES = 256 * 1024
+PAGE_CHUNK_BYTES = 64 * 1024
+PAGE_RETRY_BACKOFF = 0.5
 
 META_CANDIDATES: Tuple[Tuple[str, str], ...] = (
     ("property", "og:image:secure_url"),
@@ -45,7 +65,16 @@ META_CANDIDATES: Tuple[Tuple[str, str], ...] = (
     ("name", "thumbnail"),
 )
 
-SAFE_SLUG_RE = re.compile(r"[^a-z0-9]+")
+META_PRIORITY: Dict[Tuple[str, str], int] = {
+    candidate: rank for rank, candidate in enumerate(META_CANDIDATES)
+}
+META_CANDIDATE_ATTRS = tuple(dict.fromkeys(attr for attr, _ in META_CANDIDATES))
+LINK_REL_VALUES = frozenset({"image_src", "thumbnail"})
+LINK_RANK = len(META_CANDIDATES)
+PREVIEW_TAG_RE = re.compile(r"<(meta|link)\b[^>]*>", re.IGNORECASE)
+TAG_ATTR_RE = re.compile(
+    r'([^\s=/<>"\']+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'=<>`]+))'
+)
 
 PAGE_HEADER_VARIANTS = (
     {
@@ -90,6 +119,12 @@ def parse_args() -> argparse.Namespace:
         default=DEFAULT_IMAGE_DIR,
         help="Directory to write cached images (default: public/images/recipes)",
     )
+    parser.add_argument(
+        "--cache-index",
+        type=Path,
+        default=DEFAULT_CACHE_INDEX_PATH,
+        help="Where to keep the download revalidation index (default: .image_cache_index.json)",
+    )
     parser.add_argument(
         "--skip-existing",
         action="store_true",
@@ -100,34 +135,43 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Describe planned actions without downloading or writing files",
     )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Maximum number of recipes processed at once (default: {DEFAULT_CONCURRENCY})",
+    )
     return parser.parse_args()
 
 
-def load_recipes(path: Path) -> Dict:
-    with path.open("r", encoding="utf-8") as handle:
-        return json.load(handle)
-
-
-def ensure_directory(path: Path) -> None:
-    path.mkdir(parents=True, exist_ok=True)
+def build_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=POOL_SIZE,
+        pool_maxsize=POOL_SIZE,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.3,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 
-def slugify(value: str) -> str:
-    slug = SAFE_SLUG_RE.sub("-", value.lower()).strip("-")
-    if slug:
-        return slug[:60]
-    return f"recipe-{hashlib.sha1(value.encode('utf-8')).hexdigest()[:10]}"
+def guess_extension(url: str, content_type: Optional[str]) -> str:
+    ctype = content_type.split(";")[0].strip().lower() if content_type else None
+    return _guess_extension(url_suffix(url), ctype)
 
 
-def guess_extension(url: str, content_type: Optional[str]) -> str:
-    parsed = urlparse(url)
-    suffix = Path(parsed.path).suffix.lower()
+@functools.lru_cache(maxsize=4096)
+def _guess_extension(suffix: str, ctype: Optional[str]) -> str:
     if suffix and not suffix.endswith(".php"):
         if suffix in {".jpg", ".jpeg", ".png", ".gif", ".webp", ".avif"}:
             return ".jpg" if suffix == ".jpeg" else suffix
 
-    if content_type:
-        ctype = content_type.split(";")[0].strip()
+    if ctype:
         guess = mimetypes.guess_extension(ctype)
         if guess:
             if guess == ".jpe":
@@ -137,150 +181,277 @@ def guess_extension(url: str, content_type: Optional[str]) -> str:
     return ".jpg"
 
 
-def to_public_path(path: Path) -> Optional[str]:
-    try:
-        relative = path.relative_to(Path("public"))
-    except ValueError:
-        return None
-    return f"/{relative.as_posix()}"
-
-
-def _meta_regex(attr: str, value: str) -> re.Pattern[str]:
-    pattern = rf'<meta[^>]*{attr}\s*=\s*(["\']){re.escape(value)}\1[^>]*>'
-    return re.compile(pattern, re.IGNORECASE)
-
-
-def _extract_content(tag: str) -> Optional[str]:
-    match = re.search(r'content\s*=\s*(["\'])(.*?)\1', tag, re.IGNORECASE)
-    if not match:
-        return None
-    return html.unescape(match.group(2).strip())
+def _parse_attributes(tag: str) -> Dict[str, str]:
+    attributes: Dict[str, str] = {}
+    for match in TAG_ATTR_RE.finditer(tag):
+        name, double, single, bare = match.groups()
+        value = double if double is not None else single if single is not None else bare
+        attributes.setdefault(name.lower(), value)
+    return attributes
 
 
 def _extract_preview_from_html(html_text: str, base_url: str) -> Optional[str]:
     snippet = html_text[:200_000]
 
-    for attr, value in META_CANDIDATES:
-        match = _meta_regex(attr, value).search(snippet)
-        if match:
-            content = _extract_content(match.group(0))
-            if content:
-                return urljoin(base_url, content)
-
-    link_match = re.search(
-        r'<link[^>]*rel\s*=\s*(["\'])(?:image_src|thumbnail)\1[^>]*>',
-        snippet,
-        re.IGNORECASE,
-    )
-    if link_match:
-        href_match = re.search(r'href\s*=\s*(["\'])(.*?)\1', link_match.group(0), re.IGNORECASE)
-        if href_match:
-            return urljoin(base_url, html.unescape(href_match.group(2).strip()))
+    # One walk over every <meta>/<link> tag, keeping the first tag seen per
+    # candidate; META_CANDIDATES order wins, then <link rel=image_src>.
+    found: Dict[int, str] = {}
+    for tag_match in PREVIEW_TAG_RE.finditer(snippet):
+        attributes = _parse_attributes(tag_match.group(0))
+        if tag_match.group(1).lower() == "link":
+            rel = (attributes.get("rel") or "").lower()
+            href = (attributes.get("href") or "").strip()
+            if rel in LINK_REL_VALUES and href and LINK_RANK not in found:
+                found[LINK_RANK] = html.unescape(href)
+            continue
+        for attr in META_CANDIDATE_ATTRS:
+            value = attributes.get(attr)
+            if value is None:
+                continue
+            rank = META_PRIORITY.get((attr, value.lower()))
+            if rank is not None and rank not in found:
+                found[rank] = html.unescape((attributes.get("content") or "").strip())
+        if found.get(0):
+            break
+
+    for rank in sorted(found):
+        if found[rank]:
+            return urljoin(base_url, found[rank])
 
     return None
 
 
-def resolve_preview_url(source_url: str) -> Tuple[Optional[str], Optional[str]]:
-    last_final_url: Optional[str] = None
-    for headers in PAGE_HEADER_VARIANTS:
+def _preview_from_link_header(
+    link_header: Optional[str],
+) -> Tuple[Optional[str], Optional[str]]:
+    """Return the ``rel=image_src`` and first ``rel=preload; as=image`` URLs."""
+    if not link_header:
+        return None, None
+    preload: Optional[str] = None
+    for link in requests.utils.parse_header_links(link_header):
+        url = link.get("url")
+        rels = (link.get("rel") or "").lower().split()
+        if not url:
+            continue
+        if "image_src" in rels:
+            return url, preload
+        if preload is None and "preload" in rels and (link.get("as") or "").lower() == "image":
+            preload = url
+    return None, preload
+
+
+def _fetch_preview(
+    session: requests.Session, url: str, headers: Optional[Dict[str, str]]
+) -> Tuple[Optional[str], str]:
+    with session.get(url, headers=headers, timeout=30, stream=True) as response:
+        response.raise_for_status()
+        final_url = response.url or url
+
+        # A Link: rel=image_src header names the preview outright, so the body
+        # never needs to be read. Preloaded images are often logos or hero
+        # sprites, so they only stand in when the page itself names nothing.
+        image_src, preload = _preview_from_link_header(response.headers.get("Link"))
+        if image_src:
+            return urljoin(final_url, image_src), final_url
+
+        # Only the head of the page is ever parsed, so stop reading once enough
+        # bytes have arrived instead of pulling multi-megabyte pages in full.
+        chunks = []
+        total = 0
+        for chunk in response.iter_content(PAGE_CHUNK_BYTES):
+            chunks.append(chunk)
+            total += len(chunk)
+            if total >= MAX_PAGE_BYTES:
+                break
+        html_text = b"".join(chunks).decode(response.encoding or "utf-8", errors="replace")
+    preview = _extract_preview_from_html(html_text, final_url)
+    if not preview and preload:
+        preview = urljoin(final_url, preload)
+    return preview, final_url
+
+
+def resolve_preview_url(
+    session: requests.Session, source_url: str
+) -> Tuple[Optional[str], Optional[str]]:
+    # Weaker header variants only help when the page was refused outright; a
+    # page that loads but has no preview tags will not grow one.
+    for attempt, variant in enumerate(PAGE_HEADER_VARIANTS):
+        if attempt:
+            time.sleep(PAGE_RETRY_BACKOFF * 2 ** (attempt - 1))
+        headers = dict(variant) if variant else None
+        if attempt == 0 and headers is not None:
+            headers["Range"] = f"bytes=0-{MAX_PAGE_BYTES - 1}"
         try:
-            response = requests.get(source_url, headers=headers, timeout=30)
-            response.raise_for_status()
+            return _fetch_preview(session, source_url, headers)
         except requests.RequestException as exc:
-            last_final_url = source_url
             print(f"[warning] Failed to fetch {source_url}: {exc}", file=sys.stderr)
-            continue
-
-        final_url = response.url or source_url
-        last_final_url = final_url
-        preview_url = _extract_preview_from_html(response.text, final_url)
-        if preview_url:
-            return preview_url, final_url
+            # The adapter has already retried connection errors, timeouts and
+            # 429/5xx answers; only a 4xx rejection might go away with
+            # different headers.
+            if exc.response is None or exc.response.status_code >= 500:
+                break
 
-    return None, last_final_url
+    return None, source_url
 
 
-def download_image(url: str, referer: Optional[str]) -> Tuple[bytes, Optional[str]]:
+def download_preview_image(
+    session: requests.Session,
+    url: str,
+    referer: Optional[str],
+    image_dir: Path,
+    final_slug: str,
+    cache_index: Dict[str, CacheRecord],
+) -> Tuple[Path, Optional[CacheRecord]]:
     headers = dict(IMAGE_HEADERS)
     if referer:
         headers["Referer"] = referer
     try:
-        response = requests.get(url, headers=headers, timeout=30)
-        response.raise_for_status()
-        return response.content, response.headers.get("Content-Type")
+        return download_image(
+            session, url, headers, image_dir, final_slug, cache_index, guess_extension
+        )
     except requests.RequestException as exc:
         raise RuntimeError(str(exc)) from exc
 
 
+def cache_preview(
+    session: requests.Session,
+    entry: Dict,
+    source_url: str,
+    preview: Tuple[Optional[str], str],
+    final_slug: str,
+    image_dir: Path,
+    existing: Set[str],
+    cache_index: Dict[str, CacheRecord],
+    dry_run: bool,
+) -> Optional[Tuple[Path, Optional[CacheRecord]]]:
+    preview_url, referer = preview
+    candidates: Iterable[Tuple[str, Optional[str], str]] = []
+    if preview_url:
+        candidates = [(preview_url, referer, "preview")]
+    else:
+        fallback = (entry.get("imageUrl") or "").strip()
+        if fallback:
+            candidates = [(fallback, source_url, "fallback imageUrl")]
+
+    last_error: Optional[str] = None
+
+    for candidate_url, candidate_referer, label in candidates:
+        target_ext = guess_extension(candidate_url, None)
+        target_path = image_dir / f"{final_slug}{target_ext}"
+
+        if target_path.name in existing:
+            return target_path, None
+
+        if dry_run:
+            print(f"[dry-run] Would download {candidate_url} ({label}) -> {target_path}")
+            return target_path, None
+
+        try:
+            target_path, record = download_preview_image(
+                session, candidate_url, candidate_referer, image_dir, final_slug, cache_index
+            )
+            if record:
+                print(f"Downloaded {candidate_url} ({label}) -> {target_path}")
+            else:
+                print(f"Not modified {candidate_url} ({label}) -> {target_path}")
+            return target_path, record
+        except Exception as exc:  # noqa: BLE001
+            last_error = str(exc)
+            print(f"[warning] Failed to download {candidate_url} ({label}): {exc}", file=sys.stderr)
+
+    if last_error:
+        print(f"[warning] No image cached for {source_url}: {last_error}", file=sys.stderr)
+    return None
+
+
+def cache_previews(
+    session: requests.Session,
+    jobs: List[Tuple[Dict, str, str]],
+    image_dir: Path,
+    existing: Set[str],
+    cache_index: Dict[str, CacheRecord],
+    dry_run: bool,
+    concurrency: int,
+) -> List[Optional[Tuple[Path, Optional[CacheRecord]]]]:
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        # Recipes often share a source page, so fetch each page once up front
+        # instead of letting concurrent workers race to resolve the same URL.
+        source_urls = list(dict.fromkeys(source_url for _, source_url, _ in jobs))
+        previews = dict(
+            zip(source_urls, executor.map(lambda url: resolve_preview_url(session, url), source_urls))
+        )
+
+        def run(job: Tuple[Dict, str, str]) -> Optional[Tuple[Path, Optional[CacheRecord]]]:
+            entry, source_url, final_slug = job
+            return cache_preview(
+                session,
+                entry,
+                source_url,
+                previews[source_url],
+                final_slug,
+                image_dir,
+                existing,
+                cache_index,
+                dry_run,
+            )
+
+        return list(executor.map(run, jobs))
+
+
 def update_recipes(
     recipes: Dict,
     image_dir: Path,
     skip_existing: bool,
     dry_run: bool,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    session: Optional[requests.Session] = None,
+    cache_index_path: Path = DEFAULT_CACHE_INDEX_PATH,
 ) -> bool:
     ensure_directory(image_dir)
+    existing = list_existing_files(image_dir) if skip_existing else set()
     changed = False
-    slug_counts: Dict[str, int] = {}
+    jobs: List[Tuple[Dict, str, str]] = []
 
+    # Resolve every slug before any I/O so numbering never depends on the
+    # order in which fetches finish.
+    eligible: List[Tuple[Dict, str]] = []
     for entry in recipes.get("recipes", []):
         source_url = (entry.get("sourceUrl") or "").strip()
-        title = (entry.get("title") or "recipe").strip() or "recipe"
-
-        if not source_url:
-            continue
-
-        slug = slugify(title)
-        slug_counts[slug] = slug_counts.get(slug, 0) + 1
-        final_slug = slug if slug_counts[slug] == 1 else f"{slug}-{slug_counts[slug]}"
+        if source_url:
+            eligible.append((entry, source_url))
+    final_slugs = assign_slugs(
+        (entry.get("title") or "recipe").strip() or "recipe" for entry, _ in eligible
+    )
 
+    for (entry, source_url), final_slug in zip(eligible, final_slugs):
         existing_local = (entry.get("imageUrl") or "").strip().startswith("/")
         if skip_existing and existing_local:
             continue
 
-        preview_url, referer = resolve_preview_url(source_url)
-        candidates: Iterable[Tuple[str, Optional[str], str]] = []
-        if preview_url:
-            candidates = [(preview_url, referer, "preview")]
-        else:
-            fallback = (entry.get("imageUrl") or "").strip()
-            if fallback:
-                candidates = [(fallback, source_url, "fallback imageUrl")]
-
-        saved_path: Optional[Path] = None
-        last_error: Optional[str] = None
-
-        for candidate_url, candidate_referer, label in candidates:
-            target_ext = guess_extension(candidate_url, None)
-            target_path = image_dir / f"{final_slug}{target_ext}"
-
-            if skip_existing and target_path.exists():
-                saved_path = target_path
-                break
-
-            if dry_run:
-                print(f"[dry-run] Would download {candidate_url} ({label}) -> {target_path}")
-                saved_path = target_path
-                break
+        jobs.append((entry, source_url, final_slug))
 
-            try:
-                content, content_type = download_image(candidate_url, candidate_referer)
-                target_ext = guess_extension(candidate_url, content_type)
-                target_path = image_dir / f"{final_slug}{target_ext}"
-                target_path.write_bytes(content)
-                print(f"Downloaded {candidate_url} ({label}) -> {target_path}")
-                saved_path = target_path
-                break
-            except Exception as exc:  # noqa: BLE001
-                last_error = str(exc)
-                print(f"[warning] Failed to download {candidate_url} ({label}): {exc}", file=sys.stderr)
+    if not jobs:
+        return changed
 
-        if not saved_path:
-            if last_error:
-                print(f"[warning] No image cached for {source_url}: {last_error}", file=sys.stderr)
-            continue
+    # Page and image fetches are network-bound, so whole recipes run on a
+    # thread pool sharing one Session; entries and the cache index are only
+    # mutated here once every fetch has settled.
+    session = session or build_session()
+    cache_index = load_cache_index(cache_index_path)
+    results = cache_previews(
+        session, jobs, image_dir, existing, cache_index, dry_run, concurrency
+    )
+    if dry_run:
+        return changed
 
-        if dry_run:
+    index_changed = False
+    for (entry, _, final_slug), result in zip(jobs, results):
+        if result is None:
             continue
+        saved_path, record = result
+        if record:
+            cache_index[cache_key(record["url"], final_slug)] = record
+            index_changed = True
 
         mapped = to_public_path(saved_path)
         if mapped:
@@ -291,6 +462,8 @@ def update_recipes(
             entry["imageUrl"] = saved_path.as_posix()
             changed = True
 
+    if index_changed:
+        save_cache_index(cache_index_path, cache_index)
     return changed
 
 
@@ -298,15 +471,21 @@ def main() -> int:
     args = parse_args()
 
     recipes = load_recipes(args.recipes_file)
-    changed = update_recipes(recipes, args.image_dir, args.skip_existing, args.dry_run)
+    changed = update_recipes(
+        recipes,
+        args.image_dir,
+        args.skip_existing,
+        args.dry_run,
+        args.concurrency,
+        build_session(),
+        args.cache_index,
+    )
 
     if args.dry_run:
         return 0
 
     if changed:
-        with args.output_file.open("w", encoding="utf-8") as handle:
-            json.dump(recipes, handle, ensure_ascii=False, indent=2)
-            handle.write("\n")
+        write_recipes(args.output_file, recipes)
         print(f"Wrote updated recipes to {args.output_file}")
     else:
         print("No changes made.")
@@ -1,16 +1,25 @@
+import functools
+import hashlib
 import html
 import json
 import re
 import subprocess
 import unicodedata
 import zlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 from urllib.parse import urlparse, urlunparse
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
 PDF_PATH = Path("Recipies.pdf")
 OUTPUT_PATH = Path("recipes_from_pdf.json")
+FETCH_CONCURRENCY = 16
 
 INGREDIENT_KEYWORDS = [
     "you need",
@@ -111,9 +120,26 @@ MEASUREMENT_TOKENS = [
     "sticks",
 ]
 
-MEASUREMENT_PATTERN = re.compile(r"\b(" + "|".join(MEASUREMENT_TOKENS) + r")\b")
-
-MEAT_KEYWORDS = {
+INGREDIENT_HINT_PATTERN = re.compile(r"\d|\b(?:" + "|".join(MEASUREMENT_TOKENS) + r")\b")
+BULLET_PATTERN = re.compile(r"^[\-•–—]\s*(.+)$")
+NUMBERED_PATTERN = re.compile(r"^[0-9]+[).]")
+STEP_NUMBER_PATTERN = re.compile(r"^(?:step\s*)?(\d+)[)\.:\-]?\s*(.+)$", re.IGNORECASE)
+
+# Classifies an ingredient-section line by how it starts; each branch is named
+# after the bucket it selects and the branches are listed in priority order.
+INGREDIENT_LINE_PATTERN = re.compile(
+    r"(?P<skip>#|http)"
+    r"|(?P<stop>" + "|".join(map(re.escape, INGREDIENT_STOPWORDS)) + r")"
+    r"|(?P<numbered>[0-9]+[).])"
+    r"|(?P<bullet>[\-•–—].)"
+    r"|(?P<prefix>optional toppings|optional:|toppings|garnish|for the)"
+)
+
+INGREDIENT_KEYWORD_PATTERN = re.compile("|".join(map(re.escape, INGREDIENT_KEYWORDS)))
+INSTRUCTION_KEYWORD_PATTERN = re.compile("|".join(map(re.escape, INSTRUCTION_KEYWORDS)))
+INSTRUCTION_TERMINATOR_PATTERN = re.compile("|".join(map(re.escape, INSTRUCTION_TERMINATORS)))
+
+MEAT_KEYWORDS = frozenset({
     "beef",
     "chicken",
     "turkey",
@@ -151,7 +177,7 @@ MEAT_KEYWORDS = {
     "short rib",
     "short ribs",
     "steak",
-}
+})
 
 BREAKFAST_KEYWORDS = [
     "breakfast",
@@ -230,11 +256,91 @@ COURSE_KEYWORDS = {
     "appetizer": ["appetizer", "starter", "bites"],
 }
 
+ROAST_KEYWORDS = ["roast", "sheet pan", "tray bake", "roasted"]
+GRILL_KEYWORDS = ["grill", "grilled", "bbq", "barbecue"]
+
+
+KeywordGroup = Tuple[Optional[re.Pattern], Tuple[str, ...]]
+KeywordMap = Tuple[Optional[re.Pattern], Dict[str, Set[str]], Tuple[Tuple[str, str], ...]]
+
+
+def _compile_keyword(keyword: str) -> re.Pattern:
+    return re.compile(rf"\b{re.escape(keyword)}s?\b")
+
+
+def _compile_alternation(words: Iterable[str]) -> Optional[re.Pattern]:
+    words = list(dict.fromkeys(words))
+    if not words:
+        return None
+    return re.compile(r"\b(" + "|".join(map(re.escape, words)) + r")s?\b")
+
+
+def compile_keyword_group(keywords: Iterable[str]) -> KeywordGroup:
+    """Fuse single-word keywords into one pattern; phrases stay substring checks."""
+    keywords = list(keywords)
+    pattern = _compile_alternation(kw for kw in keywords if " " not in kw)
+    phrases = tuple(kw for kw in keywords if " " in kw)
+    return pattern, phrases
+
+
+def compile_keyword_map(groups: Dict[str, List[str]]) -> KeywordMap:
+    """Fuse every keyword of a tag -> keywords mapping into one pattern."""
+    word_tags: Dict[str, Set[str]] = {}
+    phrases: List[Tuple[str, str]] = []
+    for tag, keywords in groups.items():
+        for keyword in keywords:
+            if " " in keyword:
+                phrases.append((keyword, tag))
+            else:
+                word_tags.setdefault(keyword, set()).add(tag)
+    return _compile_alternation(word_tags), word_tags, tuple(phrases)
+
+
+def group_in_text(text: str, group: KeywordGroup) -> bool:
+    pattern, phrases = group
+    if any(phrase in text for phrase in phrases):
+        return True
+    return pattern is not None and pattern.search(text) is not None
+
+
+def tags_in_text(text: str, keyword_map: KeywordMap) -> Set[str]:
+    pattern, word_tags, phrases = keyword_map
+    found = {tag for phrase, tag in phrases if phrase in text}
+    if pattern is not None:
+        for word in pattern.findall(text):
+            found.update(word_tags[word])
+    return found
+
+
+_KEYWORD_RE = {
+    keyword: _compile_keyword(keyword)
+    for keyword in ["vegan", "appetizer", "breakfast", "brunch", "dessert", "salad", "soup"]
+}
+
+_MEAL_MAP = compile_keyword_map(MEAL_KEYWORDS)
+_COURSE_MAP = compile_keyword_map(COURSE_KEYWORDS)
+_BREAKFAST_GROUP = compile_keyword_group(BREAKFAST_KEYWORDS)
+_DESSERT_GROUP = compile_keyword_group(DESSERT_KEYWORDS)
+_DRINK_GROUP = compile_keyword_group(DRINK_KEYWORDS)
+_ROAST_GROUP = compile_keyword_group(ROAST_KEYWORDS)
+_GRILL_GROUP = compile_keyword_group(GRILL_KEYWORDS)
+_MEAT_GROUP = compile_keyword_group(sorted(MEAT_KEYWORDS))
+
 
 def keyword_in_text(text: str, keyword: str) -> bool:
     if " " in keyword:
         return keyword in text
-    return re.search(rf"\b{re.escape(keyword)}s?\b", text) is not None
+    pattern = _KEYWORD_RE.get(keyword)
+    if pattern is None:
+        pattern = _KEYWORD_RE[keyword] = _compile_keyword(keyword)
+    return pattern.search(text) is not None
+
+
+# The first "reel" (else "p") path segment and the non-empty segment after it.
+INSTAGRAM_SEGMENT_PATTERNS = tuple(
+    (content_type, re.compile(rf"(?:^|/){content_type}(?=/|$)/*([^/]*)"))
+    for content_type in ("reel", "p")
+)
 
 
 def normalize_instagram_url(url: str) -> str:
@@ -243,91 +349,87 @@ def normalize_instagram_url(url: str) -> str:
     except Exception:
         return url
 
-    segments = [segment for segment in parsed.path.split("/") if segment]
-    shortcode = None
-    content_type = None
-
-    if "reel" in segments:
-        idx = segments.index("reel")
-        if idx + 1 < len(segments):
-            content_type = "reel"
-            shortcode = segments[idx + 1]
-    elif "p" in segments:
-        idx = segments.index("p")
-        if idx + 1 < len(segments):
-            content_type = "p"
-            shortcode = segments[idx + 1]
-
-    if content_type and shortcode:
-        return f"https://www.instagram.com/{content_type}/{shortcode}/"
+    for content_type, pattern in INSTAGRAM_SEGMENT_PATTERNS:
+        match = pattern.search(parsed.path)
+        if match:
+            shortcode = match.group(1)
+            if shortcode:
+                return f"https://www.instagram.com/{content_type}/{shortcode}/"
+            break
 
     # Fallback to original without query parameters
     cleaned = parsed._replace(query="", fragment="")
     return urlunparse(cleaned)
 
 
+PDF_TEXT_PATTERN = re.compile(r"\[((?s:.*?))\]\s*TJ|\((.*?)\)\s*Tj")
+PDF_TIMESTAMP_PATTERN = re.compile(r"\d{1,2}(?:/\d{1,2}/\d{2}|:\d{2})")
+PDF_ESCAPE_PATTERN = re.compile(r"\\([0-7]{1,3}|.)?", re.DOTALL)
+PDF_ESCAPES = {"n": "\n", "r": "\r", "t": "\t", "b": "\b", "f": "\f"}
+
+
+def _decode_pdf_escape(match: re.Match) -> str:
+    esc = match.group(1)
+    if esc is None:
+        return ""
+    if esc[0] in "01234567":
+        return chr(int(esc, 8))
+    return PDF_ESCAPES.get(esc, esc)
+
+
 def decode_pdf_string(data: str) -> str:
     """Decode a PDF string literal."""
-    out = []
-    i = 0
-    while i < len(data):
-        ch = data[i]
-        if ch == "\\":
-            i += 1
-            if i >= len(data):
-                break
-            esc = data[i]
-            if esc in "()\\":
-                out.append(esc)
-            elif esc == "n":
-                out.append("\n")
-            elif esc == "r":
-                out.append("\r")
-            elif esc == "t":
-                out.append("\t")
-            elif esc == "b":
-                out.append("\b")
-            elif esc == "f":
-                out.append("\f")
-            elif esc in "01234567":
-                oct_digits = esc
-                j = 1
-                while j < 3 and i + j < len(data) and data[i + j] in "01234567":
-                    oct_digits += data[i + j]
-                    j += 1
-                i += j - 1
-                out.append(chr(int(oct_digits, 8)))
-            else:
-                out.append(esc)
-        else:
-            out.append(ch)
-        i += 1
-    return "".join(out)
+    if "\\" not in data:
+        return data
+    return PDF_ESCAPE_PATTERN.sub(_decode_pdf_escape, data)
+
+
+def inflate_stream(data: bytes) -> bytes:
+    """Inflate a Flate-encoded stream, returning ``data`` as-is if it is not one."""
+    inflater = zlib.decompressobj()
+    try:
+        inflated = inflater.decompress(data) + inflater.flush()
+    except zlib.error:
+        return data
+    return inflated if inflater.eof else data
 
 
 def parse_pdf_pairs(pdf_path: Path) -> List[Tuple[str, str]]:
     """Extract (title, url) pairs from the PDF file."""
     raw = pdf_path.read_bytes()
     streams: List[str] = []
+    decoded: Dict[bytes, str] = {}
     for match in re.finditer(br"stream\r?\n(.*?)endstream", raw, re.DOTALL):
         stream_data = match.group(1).lstrip(b"\r\n")
-        try:
-            stream_data = zlib.decompress(stream_data)
-        except Exception:
-            pass
-        streams.append(stream_data.decode("latin-1", errors="ignore"))
+        key = hashlib.blake2b(stream_data, digest_size=16).digest()
+        content = decoded.get(key)
+        if content is None:
+            content = inflate_stream(stream_data).decode("latin-1", errors="ignore")
+            decoded[key] = content
+        streams.append(content)
 
     texts: List[str] = []
     for content in streams:
-        for array in re.findall(r"\[(.*?)\]\s*TJ", content, flags=re.DOTALL):
+        # One scan finds both operators; TJ text still goes ahead of Tj text
+        # within a stream, as it did when each operator had its own pass.
+        arrays: List[str] = []
+        strings: List[str] = []
+        for match in PDF_TEXT_PATTERN.finditer(content):
+            array = match.group(1)
+            if array is None:
+                text = decode_pdf_string(match.group(2))
+                if text.strip():
+                    strings.append(text)
+                continue
             parts = re.findall(r"\((.*?)\)", array)
-            text = "".join(decode_pdf_string(p) for p in parts)
-            if text.strip():
-                texts.append(text)
-        for string in re.findall(r"\((.*?)\)\s*Tj", content):
-            text = decode_pdf_string(string)
+            if "\\" in array:
+                text = "".join(decode_pdf_string(p) for p in parts)
+            else:
+                text = "".join(parts)
             if text.strip():
-                texts.append(text)
+                arrays.append(text)
+        texts.extend(arrays)
+        texts.extend(strings)
 
     lines: List[str] = []
     for text in texts:
@@ -346,7 +448,7 @@ def parse_pdf_pairs(pdf_path: Path) -> List[Tuple[str, str]]:
             title = None
             i += 1
             continue
-        if re.match(r"\d{1,2}/\d{1,2}/\d{2}", line) or re.match(r"\d{1,2}:\d{2}", line):
+        if PDF_TIMESTAMP_PATTERN.match(line):
             i += 1
             continue
         if line.startswith("https://"):
@@ -360,7 +462,7 @@ def parse_pdf_pairs(pdf_path: Path) -> List[Tuple[str, str]]:
                     break
                 if nxt.lower().startswith("page "):
                     break
-                if re.match(r"\d{1,2}/\d{1,2}/\d{2}", nxt) or re.match(r"\d{1,2}:\d{2}", nxt):
+                if PDF_TIMESTAMP_PATTERN.match(nxt):
                     break
                 url += nxt
                 j += 1
@@ -375,12 +477,30 @@ def parse_pdf_pairs(pdf_path: Path) -> List[Tuple[str, str]]:
     return pairs
 
 
-def to_ascii(text: str) -> str:
-    """Normalize string to ASCII, dropping unsupported characters."""
+def _fold_ascii(text: str) -> str:
+    if text.isascii():
+        return text
     normalized = unicodedata.normalize("NFKD", text)
     return normalized.encode("ascii", "ignore").decode("ascii")
 
 
+@functools.lru_cache(maxsize=4096)
+def to_ascii(text: str) -> str:
+    """Normalize string to ASCII, dropping unsupported characters."""
+    return _fold_ascii(text)
+
+
+FIELD_SEPARATOR = "\x1f"
+
+
+def to_ascii_many(values: List[str]) -> List[str]:
+    """Fold several strings to ASCII with one normalization pass."""
+    parts = _fold_ascii(FIELD_SEPARATOR.join(values)).split(FIELD_SEPARATOR)
+    if len(parts) != len(values):
+        return [to_ascii(value) for value in values]
+    return parts
+
+
 def fetch_html(url: str) -> Optional[str]:
     """Fetch HTML using curl to avoid certificate issues."""
     result = subprocess.run(
@@ -394,21 +514,33 @@ def fetch_html(url: str) -> Optional[str]:
     return result.stdout.decode("utf-8", errors="ignore")
 
 
-META_PATTERN_TEMPLATE = r'<meta\s+[^>]*property=(["\']){property}\1[^>]*content=(["\'])(.*?)\2'
+OG_PROPERTIES = ("og:description", "og:image", "og:image:secure_url", "og:url")
 
+# One pass over the page collects every og:* property we use. Only "<meta" is
+# consumed (the rest is a lookahead), so a tag is never hidden by the previous
+# match, and the first occurrence of each property wins.
+OG_META_PATTERN = re.compile(
+    r'<meta(?=\s+[^>]*property=(["\'])(og:(?:description|image:secure_url|image|url))\1'
+    r'[^>]*content=(["\'])(.*?)\3)',
+    re.IGNORECASE | re.DOTALL,
+)
 
-def extract_meta_value(html_text: str, property_name: str) -> Optional[str]:
-    pattern = re.compile(
-        META_PATTERN_TEMPLATE.format(property=re.escape(property_name)),
-        re.IGNORECASE | re.DOTALL,
-    )
-    match = pattern.search(html_text)
-    if not match:
-        return None
-    return html.unescape(match.group(3))
+
+def extract_og_properties(html_text: str) -> Dict[str, str]:
+    properties: Dict[str, str] = {}
+    for match in OG_META_PATTERN.finditer(html_text):
+        name = match.group(2).lower()
+        if name in properties:
+            continue
+        value = match.group(4)
+        properties[name] = html.unescape(value) if "&" in value else value
+        if len(properties) == len(OG_PROPERTIES):
+            break
+    return properties
 
 
-def prepare_lines(description: str) -> List[str]:
+def prepare_lines(description: str) -> Tuple[List[str], List[str]]:
+    """Split ``description`` into de-duplicated lines and their lowercase forms."""
     text = description.replace("\r", "\n")
     raw_lines = [ln.strip() for ln in text.split("\n")]
     lines: List[str] = []
@@ -418,14 +550,17 @@ def prepare_lines(description: str) -> List[str]:
         if lines and lines[-1] == line:
             continue
         lines.append(line)
-    return lines
+    return lines, [line.lower() for line in lines]
 
 
-def extract_ingredients_section(lines: List[str]) -> Tuple[List[str], int]:
+def extract_ingredients_section(
+    lines: List[str], lowered: Optional[List[str]] = None
+) -> Tuple[List[str], int]:
+    if lowered is None:
+        lowered = [line.lower() for line in lines]
     start_idx = 0
-    for idx, line in enumerate(lines):
-        lower = line.lower()
-        if any(keyword in lower for keyword in INGREDIENT_KEYWORDS):
+    for idx, lower in enumerate(lowered):
+        if INGREDIENT_KEYWORD_PATTERN.search(lower):
             start_idx = idx + 1
             break
 
@@ -433,44 +568,26 @@ def extract_ingredients_section(lines: List[str]) -> Tuple[List[str], int]:
     i = start_idx
     while i < len(lines):
         line = lines[i]
-        lower = line.lower()
+        lower = lowered[i]
 
-        if lower.startswith("#") or lower.startswith("http"):
-            if ingredients:
-                break
-            i += 1
-            continue
+        match = INGREDIENT_LINE_PATTERN.match(lower)
+        kind = match.lastgroup if match else None
 
-        if any(lower.startswith(stop) or lower == stop for stop in INGREDIENT_STOPWORDS):
+        if kind in ("skip", "stop"):
             if ingredients:
                 break
             i += 1
             continue
 
-        if re.match(r"^[0-9]+[).]", line) and ingredients:
+        if kind == "numbered" and ingredients:
             break
 
-        bullet = re.match(r"^[\-•–—]\s*(.+)$", line)
-        if bullet:
-            ingredients.append(bullet.group(1).strip())
-            i += 1
-            continue
-
-        if any(
-            lower.startswith(prefix)
-            for prefix in (
-                "optional toppings",
-                "optional:",
-                "toppings",
-                "garnish",
-                "for the",
-            )
-        ):
-            ingredients.append(line)
+        if kind == "bullet":
+            ingredients.append(BULLET_PATTERN.match(line).group(1).strip())
             i += 1
             continue
 
-        if MEASUREMENT_PATTERN.search(lower) or re.search(r"\d", line):
+        if kind == "prefix" or INGREDIENT_HINT_PATTERN.search(lower):
             ingredients.append(line)
             i += 1
             continue
@@ -501,91 +618,106 @@ def extract_ingredients_section(lines: List[str]) -> Tuple[List[str], int]:
     return [], start_idx
 
 
-def extract_steps_section(lines: List[str], start_idx: int) -> List[str]:
-    steps: List[str] = []
+def extract_steps_section(
+    lines: List[str], start_idx: int, lowered: Optional[List[str]] = None
+) -> List[str]:
+    if lowered is None:
+        lowered = [line.lower() for line in lines]
+    # Each step is kept as a list of line fragments and joined once at the end.
+    steps: List[List[str]] = []
     i = start_idx
     while i < len(lines):
         line = lines[i]
-        lower = line.lower()
+        lower = lowered[i]
 
-        if lower.startswith("#") or lower.startswith("http"):
+        if lower.startswith(("#", "http")):
             break
 
-        if any(term in lower for term in INSTRUCTION_TERMINATORS):
+        if INSTRUCTION_TERMINATOR_PATTERN.search(lower):
             if steps:
                 break
 
-        if any(keyword in lower for keyword in INSTRUCTION_KEYWORDS) and not re.match(
-            r"^[0-9]+[).]", line
-        ):
+        if INSTRUCTION_KEYWORD_PATTERN.search(lower) and not NUMBERED_PATTERN.match(line):
             i += 1
             continue
 
-        numeric = re.match(r"^(?:step\s*)?(\d+)[)\.:\-]?\s*(.+)$", line, re.IGNORECASE)
+        numeric = STEP_NUMBER_PATTERN.match(line)
         if numeric:
-            steps.append(numeric.group(2).strip())
+            steps.append([numeric.group(2).strip()])
             i += 1
             continue
 
-        bullet = re.match(r"^[\-•–—]\s*(.+)$", line)
+        bullet = BULLET_PATTERN.match(line)
         if bullet and steps:
-            steps.append(bullet.group(1).strip())
+            steps.append([bullet.group(1).strip()])
             i += 1
             continue
 
         if steps:
-            steps[-1] = f"{steps[-1]} {line}".strip()
+            steps[-1].append(line)
             i += 1
             continue
 
         i += 1
 
-    return steps
+    return [" ".join(fragments).strip() for fragments in steps]
 
 
 def extract_recipe_content(description: str) -> Tuple[List[str], List[str]]:
-    lines = prepare_lines(description)
-    ingredients, idx = extract_ingredients_section(lines)
-    steps = extract_steps_section(lines, idx)
+    lines, lowered = prepare_lines(description)
+    ingredients, idx = extract_ingredients_section(lines, lowered)
+    steps = extract_steps_section(lines, idx, lowered)
     return ingredients, steps
 
 
-def infer_tags(title: str, ingredients: List[str]) -> List[str]:
-    text = f"{title} {' '.join(ingredients)}".lower()
-    tags = set()
+def inference_text(title: str, ingredients: List[str]) -> str:
+    """Lowercase haystack shared by tag and meal-type inference."""
+    return f"{title} {' '.join(ingredients)}".lower()
+
+
+def infer_tags(title: str, ingredients: List[str], text: Optional[str] = None) -> List[str]:
+    if text is None:
+        text = inference_text(title, ingredients)
+    return list(_infer_tags(text))
 
-    for tag, keywords in MEAL_KEYWORDS.items():
-        if any(keyword_in_text(text, keyword) for keyword in keywords):
-            tags.add(tag)
 
-    if any(keyword_in_text(text, keyword) for keyword in BREAKFAST_KEYWORDS):
+@functools.lru_cache(maxsize=4096)
+def _infer_tags(text: str) -> Tuple[str, ...]:
+    tags = tags_in_text(text, _MEAL_MAP)
+
+    if group_in_text(text, _BREAKFAST_GROUP):
         tags.add("breakfast")
-    if any(keyword_in_text(text, keyword) for keyword in DESSERT_KEYWORDS):
+    if group_in_text(text, _DESSERT_GROUP):
         tags.add("dessert")
-    if any(keyword_in_text(text, keyword) for keyword in DRINK_KEYWORDS):
+    if group_in_text(text, _DRINK_GROUP):
         tags.add("drink")
 
-    for tag, keywords in COURSE_KEYWORDS.items():
-        if any(keyword_in_text(text, keyword) for keyword in keywords):
-            tags.add(tag)
+    tags.update(tags_in_text(text, _COURSE_MAP))
 
-    if any(keyword_in_text(text, word) for word in ["roast", "sheet pan", "tray bake", "roasted"]):
+    if group_in_text(text, _ROAST_GROUP):
         tags.add("roast")
-    if any(keyword_in_text(text, word) for word in ["grill", "grilled", "bbq", "barbecue"]):
+    if group_in_text(text, _GRILL_GROUP):
         tags.add("grill")
 
-    meat_present = any(keyword_in_text(text, word) for word in MEAT_KEYWORDS)
-    if not meat_present:
+    if not group_in_text(text, _MEAT_GROUP):
         tags.add("vegetarian")
 
     if keyword_in_text(text, "vegan"):
         tags.add("vegan")
 
-    return sorted(tags)
+    return tuple(sorted(tags))
+
 
+def infer_meal_types(
+    title: str, ingredients: List[str], tags: List[str], text: Optional[str] = None
+) -> List[str]:
+    if text is None:
+        text = inference_text(title, ingredients)
+    return list(_infer_meal_types(text, tuple(tags)))
 
-def infer_meal_types(title: str, ingredients: List[str], tags: List[str]) -> List[str]:
-    text = f"{title} {' '.join(ingredients)}".lower()
+
+@functools.lru_cache(maxsize=4096)
+def _infer_meal_types(text: str, tags: Tuple[str, ...]) -> Tuple[str, ...]:
     lowered_tags = {tag.lower() for tag in tags}
     meal_types = set()
 
@@ -597,9 +729,7 @@ def infer_meal_types(title: str, ingredients: List[str], tags: List[str]) -> Lis
         meal_types.add("brunch")
     if "dessert" in lowered_tags or keyword_in_text(text, "dessert"):
         meal_types.add("dessert")
-    for meal, keywords in MEAL_KEYWORDS.items():
-        if any(keyword_in_text(text, keyword) for keyword in keywords):
-            meal_types.add(meal)
+    meal_types.update(tags_in_text(text, _MEAL_MAP))
 
     if not meal_types:
         if "salad" in lowered_tags or keyword_in_text(text, "salad"):
@@ -613,7 +743,66 @@ def infer_meal_types(title: str, ingredients: List[str], tags: List[str]) -> Lis
         else:
             meal_types.add("dinner")
 
-    return sorted(meal_types)
+    return tuple(sorted(meal_types))
+
+
+def dump_payload(payload: Dict) -> bytes:
+    """Serialize ``payload`` as indented, ASCII-only JSON."""
+    if orjson is not None:
+        data = orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+        # orjson never escapes non-ASCII; defer to json for those payloads.
+        if data.isascii():
+            return data
+    return json.dumps(payload, indent=2).encode("ascii")
+
+
+def process_pair(pair: Tuple[str, str]) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """Fetch one recipe page and build its entry, or the failure record."""
+    title, url = pair
+    html_text = fetch_html(url)
+    if not html_text:
+        return None, {"title": title, "url": url, "reason": "fetch_failed"}
+    og = extract_og_properties(html_text)
+    description = og.get("og:description")
+    if not description:
+        return None, {"title": title, "url": url, "reason": "no_description"}
+    image_url = og.get("og:image") or og.get("og:image:secure_url")
+    if not image_url:
+        return None, {"title": title, "url": url, "reason": "no_image"}
+    canonical_url = normalize_instagram_url(og.get("og:url") or url)
+
+    ingredients, steps = extract_recipe_content(description)
+    text = inference_text(title, ingredients)
+    inferred_tags = infer_tags(title, ingredients, text)
+    meal_types = infer_meal_types(title, ingredients, inferred_tags, text)
+    folded = to_ascii_many(
+        [title, image_url, canonical_url, *ingredients, *steps, *inferred_tags, *meal_types]
+    )
+    ascii_title, ascii_image, ascii_source = folded[:3]
+    offset = 3
+    ascii_ingredients = folded[offset : offset + len(ingredients)]
+    offset += len(ingredients)
+    ascii_steps = folded[offset : offset + len(steps)]
+    offset += len(steps)
+    ascii_tags = folded[offset : offset + len(inferred_tags)]
+    ascii_meal_types = folded[offset + len(inferred_tags) :]
+    entry = {
+        "title": ascii_title,
+        "sourceUrl": ascii_source,
+        "imageUrl": ascii_image,
+        "ingredients": ascii_ingredients,
+    }
+    if ascii_steps:
+        entry["steps"] = ascii_steps
+    if ascii_tags:
+        entry["tags"] = ascii_tags
+    if ascii_meal_types:
+        entry["mealTypes"] = ascii_meal_types
+    if not ascii_ingredients:
+        entry["notes"] = "Ingredients not detected automatically."
+        fragment = " ".join(description.splitlines()[:4])
+        entry["descriptionPreview"] = to_ascii(fragment)[:280]
+    return entry, None
 
 
 def main() -> None:
@@ -624,49 +813,21 @@ def main() -> None:
     results = []
     failures = []
 
-    for idx, (title, url) in enumerate(pairs, start=1):
-        html_text = fetch_html(url)
-        if not html_text:
-            failures.append({"title": title, "url": url, "reason": "fetch_failed"})
-            continue
-        description = extract_meta_value(html_text, "og:description")
-        if not description:
-            failures.append({"title": title, "url": url, "reason": "no_description"})
-            continue
-        image_url = extract_meta_value(html_text, "og:image") or extract_meta_value(
-            html_text, "og:image:secure_url"
-        )
-        if not image_url:
-            failures.append({"title": title, "url": url, "reason": "no_image"})
-            continue
-        canonical_url = normalize_instagram_url(extract_meta_value(html_text, "og:url") or url)
-
-        ingredients, steps = extract_recipe_content(description)
-        ascii_title = to_ascii(title)
-        ascii_ingredients = [to_ascii(item) for item in ingredients]
-        ascii_image = to_ascii(image_url)
-        ascii_steps = [to_ascii(step) for step in steps]
-        ascii_source = to_ascii(canonical_url)
-        inferred_tags = infer_tags(title, ingredients)
-        ascii_tags = [to_ascii(tag) for tag in inferred_tags]
-        ascii_meal_types = [to_ascii(meal) for meal in infer_meal_types(title, ingredients, inferred_tags)]
-        entry = {
-            "title": ascii_title,
-            "sourceUrl": ascii_source,
-            "imageUrl": ascii_image,
-            "ingredients": ascii_ingredients,
-        }
-        if ascii_steps:
-            entry["steps"] = ascii_steps
-        if ascii_tags:
-            entry["tags"] = ascii_tags
-        if ascii_meal_types:
-            entry["mealTypes"] = ascii_meal_types
-        if not ascii_ingredients:
-            entry["notes"] = "Ingredients not detected automatically."
-            fragment = " ".join(description.splitlines()[:4])
-            entry["descriptionPreview"] = to_ascii(fragment)[:280]
-        results.append(entry)
+    with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY) as executor:
+        outcomes = list(executor.map(process_pair, pairs))
+
+    for entry, failure in outcomes:
+        if failure is not None:
+            failures.append(failure)
+        else:
+            results.append(entry)
+
+    missing_ingredients = missing_steps = with_tags = with_meal_types = 0
+    for item in results:
+        missing_ingredients += not item["ingredients"]
+        missing_steps += not item.get("steps")
+        with_tags += bool(item.get("tags"))
+        with_meal_types += bool(item.get("mealTypes"))
 
     payload = {
         "meta": {
@@ -674,23 +835,15 @@ def main() -> None:
             "generatedAt": datetime.now(timezone.utc).isoformat(),
             "totalRecipesDetected": len(results),
             "totalRecipesInPdf": len(pairs),
-            "recipesWithMissingIngredients": sum(
-                1 for item in results if not item["ingredients"]
-            ),
-            "recipesWithMissingSteps": sum(
-                1 for item in results if not item.get("steps")
-            ),
-            "recipesWithTags": sum(
-                1 for item in results if item.get("tags")
-            ),
-            "recipesWithMealTypes": sum(
-                1 for item in results if item.get("mealTypes")
-            ),
+            "recipesWithMissingIngredients": missing_ingredients,
+            "recipesWithMissingSteps": missing_steps,
+            "recipesWithTags": with_tags,
+            "recipesWithMealTypes": with_meal_types,
         },
         "recipes": results,
     }
 
-    OUTPUT_PATH.write_text(json.dumps(payload, indent=2), encoding="ascii")
+    OUTPUT_PATH.write_bytes(dump_payload(payload))
 
     if failures:
         failure_path = OUTPUT_PATH.with_name("recipes_fetch_failures.json")
@@ -698,7 +851,7 @@ def main() -> None:
             "meta": {"totalFailures": len(failures)},
             "failures": failures,
         }
-        failure_path.write_text(json.dumps(failure_payload, indent=2), encoding="ascii")
+        failure_path.write_bytes(dump_payload(failure_payload))
 
 
 if __name__ == "__main__":